@@ -5,12 +5,13 @@ from typing import Any, Dict, List, Optional
 
 from fastapi import APIRouter, BackgroundTasks, Depends, File, Form, HTTPException, Response, UploadFile, status, Body
 from fastapi.logger import logger
-from fastapi.responses import StreamingResponse, FileResponse
+from fastapi.responses import FileResponse, ORJSONResponse, StreamingResponse
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 import uuid
 
 from app.api import deps
-from app.models.chat import Chat, Message, Attachment, MessageRole
+from app.models.chat import Chat, Message, Attachment, MessageRole, _join_text_items
 from app.models.user import User
 from app.crud.chat import chat
 from app.schemas.chat import (
@@ -25,7 +26,7 @@ from app.schemas.chat import (
     UserMessageRequest,
     StreamingResponse as StreamingResponseSchema
 )
-from app.services.llm import generate_llm_response
+from app.services.llm import coalesce_tokens, generate_llm_response
 from app.services.file_storage import file_storage_service
 
 router = APIRouter()
@@ -43,10 +44,11 @@ def get_chats(
     """
     chats = chat.get_user_chats(db, user_id=current_user.id, skip=skip, limit=limit)
 
-    # Manually convert each chat to dictionary using model_dump
-    chats = [c.model_dump() for c in chats]
-  
-    return {"chats": chats}
+    # The response schemas read the eagerly loaded ORM objects directly (from_attributes).
+    #  Dump to Python objects, not JSON mode: orjson encodes the many UUIDs and datetimes
+    #  natively, so pydantic doesn't have to stringify them first.
+    chat_list = ChatList.model_validate({"chats": chats})
+    return ORJSONResponse(chat_list.model_dump())
 
 
 @router.post("/", response_model=ChatSchema)
@@ -60,7 +62,7 @@ def create_chat(
     Create new chat.
     """
     new_chat = chat.create(db, obj_in=chat_in, user_id=current_user.id)
-    return new_chat.model_dump()
+    return new_chat
 
 
 @router.get("/{chat_id}", response_model=ChatSchema)
@@ -79,7 +81,7 @@ def get_chat(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Chat not found",
         )
-    return chat_obj.model_dump()
+    return chat_obj
 
 
 @router.put("/{chat_id}", response_model=ChatSchema)
@@ -93,15 +95,17 @@ def update_chat(
     """
     Update a chat.
     """
-    chat_obj = chat.get(db, chat_id=chat_id, user_id=current_user.id)
+    chat_obj = chat.get_owned(db, chat_id=chat_id, user_id=current_user.id)
     if not chat_obj:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Chat not found",
         )
     
-    updated_chat = chat.update(db, db_obj=chat_obj, obj_in=chat_in)
-    return updated_chat.model_dump()
+    chat.update(db, db_obj=chat_obj, obj_in=chat_in)
+    
+    # Reload through get() so messages come back with their payload columns in one batch
+    return chat.get(db, chat_id=chat_id, user_id=current_user.id)
 
 
 @router.delete("/{chat_id}")
@@ -156,7 +160,7 @@ async def chat_with_llm(
         )
     
     # Verify chat exists and belongs to user
-    chat_obj = chat.get(db, chat_id=chat_id, user_id=current_user.id)
+    chat_obj = chat.get_owned(db, chat_id=chat_id, user_id=current_user.id)
     if not chat_obj:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -200,15 +204,8 @@ async def chat_with_llm(
         if files:
             for file in files:
                 if file.filename:  # Skip empty file uploads
-                    file_data = await file_storage_service.save_file(file, existing_message.id)
-                    chat.create_attachment(
-                        db,
-                        message_id=existing_message.id,
-                        filename=file_data["filename"],
-                        file_path=file_data["file_path"],
-                        file_type=file_data["file_type"],
-                        file_size=file_data["file_size"],
-                    )
+                    saved_file = await file_storage_service.save_file(file, existing_message.id)
+                    chat.create_attachment(db, message_id=existing_message.id, **saved_file._asdict())
         
         # Use the existing message
         user_message = existing_message
@@ -234,15 +231,8 @@ async def chat_with_llm(
         if files:
             for file in files:
                 if file.filename:  # Skip empty file uploads
-                    file_data = await file_storage_service.save_file(file, user_message.id)
-                    chat.create_attachment(
-                        db,
-                        message_id=user_message.id,
-                        filename=file_data["filename"],
-                        file_path=file_data["file_path"],
-                        file_type=file_data["file_type"],
-                        file_size=file_data["file_size"],
-                    )
+                    saved_file = await file_storage_service.save_file(file, user_message.id)
+                    chat.create_attachment(db, message_id=user_message.id, **saved_file._asdict())
     
     # Update the chat's updated_at timestamp
     chat.update(db, db_obj=chat_obj, obj_in={"title": chat_obj.title})
@@ -253,8 +243,26 @@ async def chat_with_llm(
     # Get updated conversation history
     updated_messages = chat.get_messages(db, chat_id=chat_id)
     
-    # Format db messages to openai messages
-    formatted_messages = [msg.to_openai_format() for msg in updated_messages]
+    # Format db messages to openai messages. Messages with attachments read and base64 encode
+    #  files, so format those concurrently in worker threads (bounded by the default executor)
+    #  instead of blocking the event loop. Everything they read is already loaded, so the
+    #  threads never touch the session.
+    formatted_messages = [
+        None if msg.attachments else msg.to_openai_format() for msg in updated_messages
+    ]
+    with_attachments = [i for i, msg in enumerate(updated_messages) if msg.attachments]
+    if with_attachments:
+        results = await asyncio.gather(
+            *(asyncio.to_thread(updated_messages[i].to_openai_format) for i in with_attachments)
+        )
+        for i, result in zip(with_attachments, results):
+            formatted_messages[i] = result
+    
+    # Text of the triggering message; structured content contributes its text items
+    if isinstance(message_obj.content, str):
+        last_user_text = message_obj.content
+    else:
+        last_user_text = _join_text_items(message_obj.content)
     
     # Create a function to generate and stream the response
     async def generate_stream():
@@ -272,7 +280,11 @@ async def chat_with_llm(
         content_so_far = ""
         
         # Pass the formatted messages and model to the LLM service
-        async for token in generate_llm_response(formatted_messages, chat_obj.model):
+        # Coalesce tokens so each SSE frame and database update carries a few of them
+        token_stream = generate_llm_response(
+            formatted_messages, chat_obj.model, last_user_content=last_user_text
+        )
+        async for token in coalesce_tokens(token_stream):
             content_so_far += token
             
             # Update the message content in the database periodically using the CRUD function
@@ -315,7 +327,7 @@ def get_message_attachments(
     Get all attachments for a specific message.
     """
     # Verify chat exists and belongs to user
-    chat_obj = chat.get(db, chat_id=chat_id, user_id=current_user.id)
+    chat_obj = chat.get_owned(db, chat_id=chat_id, user_id=current_user.id)
     if not chat_obj:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -355,14 +367,15 @@ def download_attachment(
     
     # Verify the user has access to this attachment
     # This is done by checking if the message's chat belongs to the user
-    message = db.query(Message).filter(Message.id == attachment.message_id).first()
-    if not message:
+    # Only the chat id is needed; loading the message would also load its attachments
+    message_chat_id = db.scalar(select(Message.chat_id).where(Message.id == attachment.message_id))
+    if message_chat_id is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Message not found",
         )
     
-    chat_obj = chat.get(db, chat_id=message.chat_id, user_id=current_user.id)
+    chat_obj = chat.get_owned(db, chat_id=message_chat_id, user_id=current_user.id)
     if not chat_obj:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -404,14 +417,15 @@ def delete_attachment(
     
     # Verify the user has access to this attachment
     # This is done by checking if the message's chat belongs to the user
-    message = db.query(Message).filter(Message.id == attachment.message_id).first()
-    if not message:
+    # Only the chat id is needed; loading the message would also load its attachments
+    message_chat_id = db.scalar(select(Message.chat_id).where(Message.id == attachment.message_id))
+    if message_chat_id is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Message not found",
         )
     
-    chat_obj = chat.get(db, chat_id=message.chat_id, user_id=current_user.id)
+    chat_obj = chat.get_owned(db, chat_id=message_chat_id, user_id=current_user.id)
     if not chat_obj:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -441,7 +455,7 @@ async def delete_message_attachment(
     This endpoint allows the frontend to directly manage attachments.
     """
     # Verify chat exists and belongs to user
-    chat_obj = chat.get(db, chat_id=chat_id, user_id=current_user.id)
+    chat_obj = chat.get_owned(db, chat_id=chat_id, user_id=current_user.id)
     if not chat_obj:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -15,6 +15,7 @@ class Settings(BaseSettings):
     
     # API settings
     API_V1_STR: str = "/api/v1"
+    ENV: str = os.getenv("ENV", "dev")  # "dev" enables auto-reload in run.py
     SECRET_KEY: str = secrets.token_urlsafe(32)
     
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8  # 8 days
@@ -84,6 +85,7 @@ class Settings(BaseSettings):
     # File storage configuration
     UPLOAD_DIR: str = os.getenv("UPLOAD_DIR", "/tmp/uploads")
     MAX_UPLOAD_SIZE: int = int(os.getenv("MAX_UPLOAD_SIZE", "10485760"))  # 10MB default
+    ATTACHMENT_CACHE_MAX_BYTES: int = int(os.getenv("ATTACHMENT_CACHE_MAX_BYTES", "134217728"))  # 128MB default
     ALLOWED_EXTENSIONS: List[str] = [
         "pdf", "txt", "doc", "docx", "xls", "xlsx", 
         "jpg", "jpeg", "png", "gif", "mp3", "mp4"
@@ -1,6 +1,7 @@
 from typing import Any, Dict, List, Optional, Union
 import uuid
-from sqlalchemy.orm import Session
+from sqlalchemy import delete
+from sqlalchemy.orm import Session, noload, raiseload, selectinload, undefer_group
 
 from app.models.chat import Chat, Message, Attachment, MessageRole
 from app.schemas.chat import ChatCreate, ChatUpdate, MessageCreate
@@ -10,6 +11,14 @@ class CRUDChat:
         """Get all chats for a user."""
         chats = (
             db.query(Chat)
+            .options(
+                selectinload(Chat.messages).options(
+                    undefer_group("payload"),
+                    selectinload(Message.attachments),
+                ),
+                # Listing only serializes what is loaded above; fail loudly on any lazy load
+                raiseload("*"),
+            )
             .filter(Chat.user_id == user_id)
             .order_by(Chat.updated_at.desc())
             .offset(skip)
@@ -31,8 +40,21 @@ class CRUDChat:
         return chat
     
     def get(self, db: Session, *, chat_id: uuid.UUID, user_id: uuid.UUID) -> Optional[Chat]:
-        """Get a specific chat by id."""
-        return db.query(Chat).filter(
+        """Get a specific chat by id, with its messages and their attachments for serializing."""
+        # populate_existing: the chat may already be in the session from get_owned, with its
+        #  messages not loaded
+        return db.query(Chat).options(
+            selectinload(Chat.messages).options(
+                undefer_group("payload"),
+                selectinload(Message.attachments),
+            )
+        ).filter(
+            Chat.id == chat_id, Chat.user_id == user_id
+        ).populate_existing().first()
+    
+    def get_owned(self, db: Session, *, chat_id: uuid.UUID, user_id: uuid.UUID) -> Optional[Chat]:
+        """Get a chat of the user without its messages, for ownership checks."""
+        return db.query(Chat).options(noload(Chat.messages)).filter(
             Chat.id == chat_id, Chat.user_id == user_id
         ).first()
     
@@ -48,22 +70,22 @@ class CRUDChat:
         
         db.add(db_obj)
         db.commit()
-        db.refresh(db_obj)
+        # No refresh: it would eagerly reload every message without its payload columns.
+        #  The expired object reloads lazily if the caller reads it again.
         return db_obj
     
     def delete(self, db: Session, *, chat_id: uuid.UUID, user_id: uuid.UUID) -> bool:
         """Delete a chat."""
-        chat = self.get(db, chat_id=chat_id, user_id=user_id)
-        if not chat:
-            return False
-        db.delete(chat)
+        # One DELETE; messages and attachments go with it through ON DELETE CASCADE
+        result = db.execute(delete(Chat).where(Chat.id == chat_id, Chat.user_id == user_id))
         db.commit()
-        return True
+        return result.rowcount > 0
     
     def get_messages(self, db: Session, *, chat_id: uuid.UUID) -> List[Message]:
         """Get all messages for a chat."""
         return (
             db.query(Message)
+            .options(undefer_group("payload"), selectinload(Message.attachments))
             .filter(Message.chat_id == chat_id)
             .order_by(Message.sequence)
             .all()
@@ -71,13 +93,13 @@ class CRUDChat:
     
     def get_message(self, db: Session, *, message_id: uuid.UUID, chat_id: uuid.UUID) -> Optional[Message]:
         """Get a specific message."""
-        return db.query(Message).filter(
+        return db.query(Message).options(undefer_group("payload")).filter(
             Message.id == message_id, Message.chat_id == chat_id
         ).first()
     
     def get_message_by_sequence(self, db: Session, *, sequence: int, chat_id: uuid.UUID) -> Optional[Message]:
         """Get a specific message by sequence."""
-        return db.query(Message).filter(
+        return db.query(Message).options(undefer_group("payload")).filter(
             Message.sequence == sequence, Message.chat_id == chat_id
         ).first()
     
@@ -111,21 +133,12 @@ class CRUDChat:
         Returns:
             int: Number of messages deleted
         """
-        # First get all messages to be deleted
-        messages_to_delete = db.query(Message).filter(
-            Message.chat_id == chat_id,
-            Message.sequence > sequence
-        ).all()
-        
-        # Count messages for return value
-        count = len(messages_to_delete)
-        
-        # Delete each message object individually to trigger cascade
-        for message in messages_to_delete:
-            db.delete(message)
-        
+        # One DELETE; attachments go with the messages through ON DELETE CASCADE
+        result = db.execute(
+            delete(Message).where(Message.chat_id == chat_id, Message.sequence > sequence)
+        )
         db.commit()
-        return count
+        return result.rowcount
     
     def get_attachments(self, db: Session, *, message_id: uuid.UUID) -> List[Attachment]:
         """Get all attachments for a message."""
@@ -140,7 +153,8 @@ class CRUDChat:
         ).first()
     
     def create_attachment(
-        self, db: Session, *, message_id: uuid.UUID, filename: str, file_path: str, file_type: str, file_size: int
+        self, db: Session, *, message_id: uuid.UUID, filename: str, file_path: str, file_type: str, file_size: int,
+        attachment_metadata: Optional[Dict[str, Any]] = None
     ) -> Attachment:
         """Create a new attachment."""
         attachment = Attachment(
@@ -149,6 +163,7 @@ class CRUDChat:
             file_path=file_path,
             file_type=file_type,
             file_size=file_size,
+            attachment_metadata=attachment_metadata,
         )
         db.add(attachment)
         db.commit()
@@ -168,7 +183,7 @@ class CRUDChat:
         self, db: Session, *, message_id: uuid.UUID, content: str, is_complete: bool = False
     ) -> Message:
         """Update an assistant message with new content."""
-        message = db.query(Message).filter(Message.id == message_id).first()
+        message = db.query(Message).options(undefer_group("payload")).filter(Message.id == message_id).first()
         if not message:
             return None
             
@@ -178,7 +193,7 @@ class CRUDChat:
             
         db.add(message)
         db.commit()
-        db.refresh(message)
+        # No refresh: called for every streamed chunk, and callers don't read the result back
         return message
 
 chat = CRUDChat() 
\ No newline at end of file
@@ -1,5 +1,5 @@
 import logging
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
@@ -15,27 +15,26 @@ logger = logging.getLogger(__name__)
 def init_db(db: Session) -> None:
     """
     Initialize the database with essential data.
+    
+    Uses INSERT ... ON CONFLICT DO NOTHING so seeding is a single round-trip
+    per table and safe when several workers run it concurrently on startup.
     """
     # Create a superuser if it doesn't exist
-    user = db.query(User).filter(User.email == settings.EMAIL_TEST_USER).first()
-    if not user:
-        try:
-            user = User(
-                email=settings.EMAIL_TEST_USER,
-                username="admin",
-                hashed_password=get_password_hash("password"),  # Change in production!
-                full_name="Admin User",
-                is_superuser=True,
-                is_active=True,
-                is_verified=True,
-            )
-            db.add(user)
-            db.commit()
-            logger.info("Created admin user")
-        except IntegrityError:
-            # Roll back the transaction if there's a constraint violation
-            db.rollback()
-            logger.info("Admin user already exists, skipping creation")
+    admin_user = {
+        "email": settings.EMAIL_TEST_USER,
+        "username": "admin",
+        "hashed_password": get_password_hash("password"),  # Change in production!
+        "full_name": "Admin User",
+        "is_superuser": True,
+        "is_active": True,
+        "is_verified": True,
+    }
+    # No conflict target: skip on either the email or the username unique constraint
+    result = db.execute(pg_insert(User).values(**admin_user).on_conflict_do_nothing())
+    if result.rowcount:
+        logger.info("Created admin user")
+    else:
+        logger.info("Admin user already exists, skipping creation")
     
     # Add system configurations if they don't exist
     configs = [
@@ -51,20 +50,12 @@ def init_db(db: Session) -> None:
         },
     ]
     
-    for config_data in configs:
-        config = db.query(SystemConfig).filter(
-            SystemConfig.key == config_data["key"]
-        ).first()
-        
-        if not config:
-            try:
-                config = SystemConfig(**config_data)
-                db.add(config)
-                db.commit()
-                logger.info(f"Created system config: {config_data['key']}")
-            except IntegrityError:
-                db.rollback()
-                logger.info(f"System config '{config_data['key']}' already exists, skipping creation")
+    result = db.execute(
+        pg_insert(SystemConfig).values(configs).on_conflict_do_nothing(index_elements=["key"])
+    )
+    logger.info(f"Created {result.rowcount} system config(s), skipped existing ones")
+    
+    db.commit()
 
 
 def main() -> None:
@@ -1,15 +1,24 @@
-from typing import Generator
+from typing import Any, Generator
 
+import orjson
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import settings
 
+
+def json_serializer(obj: Any) -> str:
+    """Serialize JSON/JSONB column values with orjson instead of the stdlib json module."""
+    return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
 # Create PostgreSQL engine
 engine = create_engine(
     str(settings.DATABASE_URI),  # Convert PostgresDsn to string
     pool_pre_ping=True,
+    json_serializer=json_serializer,
+    json_deserializer=orjson.loads,
 )
 
 # Create a session factory
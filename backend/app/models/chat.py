@@ -1,27 +1,35 @@
 import uuid
-import base64
+import contextvars
 import os
 import enum
-from typing import List, Optional, Union, Dict, Any, Literal
+from datetime import datetime
+from functools import cached_property
+from types import MappingProxyType
+from typing import Annotated, List, Optional, Union, Dict, Any, Literal
 
 from fastapi.logger import logger
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, Enum
+from sqlalchemy import (
+    Boolean, CheckConstraint, Column, Computed, ForeignKey, Index, Integer, String, Text,
+    cast, column, func, insert, inspect, literal, select, text, values,
+)
 from sqlalchemy.dialects.postgresql import UUID, JSONB
-from sqlalchemy.orm import relationship, validates
-from pydantic import BaseModel
+from sqlalchemy.orm import Session, deferred, relationship, validates
+from sqlalchemy.types import TypeDecorator
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, ValidationError
 
 from app.models.base import Base
+from app.services.attachment_cache import attachment_cache, encode_file_base64
 
 
 # File type constants
-class FileType(enum.Enum):
+class FileType(str, enum.Enum):
     IMAGE = "image"
     AUDIO = "audio"
     DOCUMENT = "document"
     OTHER = "other"
 
-# Content type map by MIME type
-MIME_TYPE_MAP = {
+# Content type map by MIME type (read-only)
+MIME_TYPE_MAP = MappingProxyType({
     'image/jpeg': FileType.IMAGE,
     'image/png': FileType.IMAGE,
     'image/gif': FileType.IMAGE, 
@@ -33,57 +41,121 @@ MIME_TYPE_MAP = {
     'application/pdf': FileType.DOCUMENT,
     'application/msword': FileType.DOCUMENT,
     'application/vnd.openxmlformats-officedocument.wordprocessingml.document': FileType.DOCUMENT,
-}
+})
 
 # Message role enum
-class MessageRole(enum.Enum):
+class MessageRole(str, enum.Enum):
     SYSTEM = "system"
     USER = "user"
     ASSISTANT = "assistant"
     TOOL = "tool"
 
+_MESSAGE_ROLES_BY_VALUE = {role.value: role for role in MessageRole}
+
+
+class MessageRoleType(TypeDecorator):
+    """Store MessageRole as its plain string value instead of a PostgreSQL enum type."""
+    
+    impl = String(16)
+    cache_ok = True
+    
+    def process_bind_param(self, value, dialect):
+        if isinstance(value, MessageRole):
+            return value.value
+        return value
+    
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return _MESSAGE_ROLES_BY_VALUE[value]
+
 # Content type for structured content
-class ContentType(enum.Enum):
+class ContentType(str, enum.Enum):
     TEXT = "text"
     IMAGE_URL = "image_url"
     INPUT_AUDIO = "input_audio"
 
-# Pydantic models for validation
+# Members are str, so plain strings from request payloads hit this set directly
+_CONTENT_TYPE_VALUES = frozenset(ContentType)
+
+# Pydantic models for validation. They are only used to check stored content, so they
+#  share a config that ignores unknown keys and freezes instances.
+_CONTENT_MODEL_CONFIG = ConfigDict(extra="ignore", frozen=True, str_strip_whitespace=False)
+
 class TextContent(BaseModel):
+    model_config = _CONTENT_MODEL_CONFIG
+    
     type: Literal["text"]
     text: str
 
+class ImageUrl(BaseModel):
+    model_config = _CONTENT_MODEL_CONFIG
+    
+    url: str
+    detail: Optional[str] = None
+
 class ImageUrlContent(BaseModel):
+    model_config = _CONTENT_MODEL_CONFIG
+    
     type: Literal["image_url"]
-    image_url: Dict[str, str]
+    image_url: ImageUrl
+
+class InputAudio(BaseModel):
+    model_config = _CONTENT_MODEL_CONFIG
+    
+    data: str
+    format: str
 
 class AudioContent(BaseModel):
+    model_config = _CONTENT_MODEL_CONFIG
+    
     type: Literal["input_audio"]
-    input_audio: Dict[str, str]
+    input_audio: InputAudio
 
-ContentItem = Union[TextContent, ImageUrlContent, AudioContent]
+ContentItem = Annotated[Union[TextContent, ImageUrlContent, AudioContent], Field(discriminator="type")]
 
 class ToolFunction(BaseModel):
+    model_config = _CONTENT_MODEL_CONFIG
+    
     name: str
     arguments: Optional[str] = None
 
 class ToolCall(BaseModel):
+    model_config = _CONTENT_MODEL_CONFIG
+    
     id: str
     type: str
     function: Optional[ToolFunction] = None
 
+# Validators compiled once at import; each checks a whole list in a single call
+_CONTENT_LIST_ADAPTER = TypeAdapter(List[ContentItem])
+_TEXT_CONTENT_LIST_ADAPTER = TypeAdapter(List[TextContent])
+_TOOL_CALLS_ADAPTER = TypeAdapter(List[ToolCall])
+
+# Set while a factory method builds content it has already validated (or constructed
+#  itself from plain text), so the `_content` validator doesn't redo the same checks.
+#  Direct Message(...) construction and CRUD updates still go through the validator.
+_trusted_content: contextvars.ContextVar[bool] = contextvars.ContextVar("trusted_message_content", default=False)
+
 class Chat(Base):
     """Model representing a conversation session."""
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     title = Column(String(255), nullable=True)
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     model = Column(String(100), nullable=True)  # The LLM model used
     is_archived = Column(Boolean, default=False)
     
     # Relationships
     user = relationship("User", back_populates="chats")
-    messages = relationship("Message", back_populates="chat", cascade="all, delete-orphan", order_by="Message.sequence")
+    messages = relationship(
+        "Message",
+        back_populates="chat",
+        cascade="all, delete-orphan",
+        passive_deletes=True,  # Let the database cascade the delete via ON DELETE CASCADE
+        order_by="Message.sequence",
+        lazy="selectin",  # model_dump always walks the messages, load them in one batch
+    )
     
     def model_dump(self):
         """Convert the model to a dictionary compatible with Pydantic schemas."""
@@ -106,20 +178,56 @@ class Message(Base):
     __tablename__ = "message"
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    chat_id = Column(UUID(as_uuid=True), ForeignKey("chat.id"), nullable=False)
-    role = Column(Enum(MessageRole), nullable=False)
+    chat_id = Column(UUID(as_uuid=True), ForeignKey("chat.id", ondelete="CASCADE"), nullable=False)
+    role = Column(MessageRoleType(), nullable=False)
     sequence = Column(Integer, nullable=False)  # Message order in the conversation
     
-    # Content field (JSON for all types)
-    _content = Column(JSONB, nullable=True, name="content_json")
+    # Content field (JSON for all types). The JSONB payload columns are deferred as the
+    #  "payload" group so metadata-only queries don't pull (possibly TOASTed) bodies;
+    #  queries that serialize messages undefer the group explicitly.
+    _content = deferred(Column(JSONB, nullable=True, name="content_json"), group="payload")
+    # Space-joined text items of _content, written once when the content is set so
+    #  to_openai_format doesn't rebuild it on every serialization
+    text_cache = deferred(Column(Text, nullable=True), group="payload")
+    # Hot fields of _content, generated by the database so they can be filtered and
+    #  indexed without reading the JSONB body
+    _tool_call_id = Column("tool_call_id", Text, Computed("content_json ->> 'tool_call_id'", persisted=True))
+    has_tool_calls = Column(Boolean, Computed("content_json ? 'tool_calls'", persisted=True))
     
     # Metadata fields
     tokens = Column(Integer, nullable=True)
-    message_metadata = Column(JSONB, nullable=True)
+    message_metadata = deferred(Column(JSONB, nullable=True), group="payload")
     
     # Relationships
     chat = relationship("Chat", back_populates="messages")
-    attachments = relationship("Attachment", back_populates="message", cascade="all, delete-orphan")
+    attachments = relationship(
+        "Attachment",
+        back_populates="message",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+        lazy="selectin",
+    )
+    
+    __table_args__ = (
+        # Add check constraint for role, replacing the PostgreSQL enum type
+        CheckConstraint(role.in_([r.value for r in MessageRole]), name="check_message_role"),
+        # Serves the ordered Chat.messages load and sequence lookups; also covers chat_id alone.
+        #  The small per-message columns ride along for index-only scans; content_json is left
+        #  out, since large payloads would exceed the btree tuple size limit.
+        Index("ix_message_chat_seq", "chat_id", "sequence", postgresql_include=["role", "tokens"]),
+        # Looks up tool results by the call they answer; partial, so only tool rows are indexed
+        Index(
+            "ix_message_tool_call_id",
+            "tool_call_id",
+            postgresql_where=text("role = 'tool'"),
+        ),
+        # Finds assistant turns that requested tools
+        Index(
+            "ix_message_has_tool_calls",
+            "chat_id",
+            postgresql_where=text("has_tool_calls"),
+        ),
+    )
     
     # Add model_dump method for Pydantic schema compatibility, this is important when queried data
     #  need to be validated by Pydantic schemas
@@ -132,10 +240,11 @@ class Message(Base):
         if content is None:
             content = ""
         
+        attachments = self.attachments
         result = {
             "id": self.id,
             "chat_id": self.chat_id,
-            "role": self.role,  # Convert Enum to string value
+            "role": self.role,  # MessageRole, coerced from the stored string by MessageRoleType
             "sequence": self.sequence,
             "content": content,  # Required string field in Pydantic schema
             "reasoning_content": None,
@@ -143,63 +252,81 @@ class Message(Base):
             "message_metadata": self.message_metadata,
             "created_at": self.created_at,
             "updated_at": self.updated_at,
-            "attachments": [attachment.model_dump() for attachment in self.attachments] if self.attachments else []
+            "attachments": [attachment.model_dump() for attachment in attachments] if attachments else []
         }
         return result
     
     # Factory methods for different message types
+    @classmethod
+    def _create_trusted(cls, **kwargs) -> "Message":
+        """Instantiate a message whose content was already validated by the caller."""
+        token = _trusted_content.set(True)
+        try:
+            return cls(**kwargs)
+        finally:
+            _trusted_content.reset(token)
+    
     @classmethod
     def create_system_message(cls, chat_id: uuid.UUID, content: str, sequence: int) -> "Message":
         """Create a system message with text content."""
-        return cls(
+        return cls._create_trusted(
             chat_id=chat_id,
             role=MessageRole.SYSTEM,
             sequence=sequence,
-            _content={"content": [{"type": "text", "text": content}]}
+            _content={"content": [{"type": "text", "text": content}]},
+            text_cache=content,
         )
     
     @classmethod
     def create_user_message(cls, chat_id: uuid.UUID, content: Union[str, List[Dict[str, Any]]], sequence: int) -> "Message":
         """Create a user message with text or structured content."""
         if isinstance(content, str):
-            content = [{"type": "text", "text": content}]
-        else:
-            # Validate structured content
-            for item in content:
-                if "type" not in item:
-                    raise ValueError("Each content item must have a 'type' field")
-                if item["type"] not in [t.value for t in ContentType]:
-                    raise ValueError(f"Invalid content type: {item['type']}")
+            # Plain text is wrapped here, so there is nothing left for the validator to check
+            return cls._create_trusted(
+                chat_id=chat_id,
+                role=MessageRole.USER,
+                sequence=sequence,
+                _content={"content": [{"type": "text", "text": content}]},
+                text_cache=content,
+            )
+        
+        # Validate structured content, once, so the validator can trust it
+        for item in content:
+            if "type" not in item:
+                raise ValueError("Each content item must have a 'type' field")
+            if item["type"] not in _CONTENT_TYPE_VALUES:
+                raise ValueError(f"Invalid content type: {item['type']}")
+        _CONTENT_LIST_ADAPTER.validate_python(content)
         
-        return cls(
+        return cls._create_trusted(
             chat_id=chat_id,
             role=MessageRole.USER,
             sequence=sequence,
-            _content={"content": content}
+            _content={"content": content},
+            text_cache=_join_text_items(content),
         )
     
     @classmethod
     def create_assistant_message(cls, chat_id: uuid.UUID, content: Optional[str], sequence: int, 
                                 tool_calls: Optional[List[Dict[str, Any]]] = None) -> "Message":
         """Create an assistant message with optional tool calls."""
-        message_content = [{"type": "text", "text": content or ""}]
+        text_content = content or ""
+        message_content = [{"type": "text", "text": text_content}]
         
         content_data = {"content": message_content}
         
         if tool_calls:
-            # Validate tool calls using Pydantic model
-            validated_tool_calls = []
-            for call_data in tool_calls:
-                # Convert to ToolCall model to validate
-                tool_call = ToolCall(**call_data)
-                validated_tool_calls.append(tool_call.model_dump())
-            content_data["tool_calls"] = validated_tool_calls
+            # Validate all tool calls in one pass and store them as given, without a
+            #  model -> dict round-trip per call
+            _TOOL_CALLS_ADAPTER.validate_python(tool_calls)
+            content_data["tool_calls"] = list(tool_calls)
         
-        return cls(
+        return cls._create_trusted(
             chat_id=chat_id,
             role=MessageRole.ASSISTANT,
             sequence=sequence,
-            _content=content_data
+            _content=content_data,
+            text_cache=text_content,
         )
     
     @classmethod
@@ -209,27 +336,38 @@ class Message(Base):
             raise ValueError("Tool message must have a tool_call_id")
         
         if isinstance(content, str):
-            message_content = [{"type": "text", "text": content}]
-        else:
-            # Validate structured content, tool message support only text (not image or audio)
-            for item in content:
-                if "type" not in item:
-                    raise ValueError("Each content item must have a 'type' field")
-                if item["type"] != ContentType.TEXT.value:
-                    raise ValueError(f"Invalid content type for tool message: {item['type']}")
-            message_content = content
+            return cls._create_trusted(
+                chat_id=chat_id,
+                role=MessageRole.TOOL,
+                sequence=sequence,
+                _content={"content": [{"type": "text", "text": content}], "tool_call_id": tool_call_id},
+                text_cache=content,
+            )
+        
+        # Validate structured content, tool message support only text (not image or audio)
+        text_type = ContentType.TEXT
+        for item in content:
+            if "type" not in item:
+                raise ValueError("Each content item must have a 'type' field")
+            if item["type"] != text_type:
+                raise ValueError(f"Invalid content type for tool message: {item['type']}")
+        _TEXT_CONTENT_LIST_ADAPTER.validate_python(content)
         
-        return cls(
+        return cls._create_trusted(
             chat_id=chat_id,
             role=MessageRole.TOOL,
             sequence=sequence,
-            _content={"content": message_content, "tool_call_id": tool_call_id}
+            _content={"content": content, "tool_call_id": tool_call_id},
+            text_cache=_join_text_items(content),
         )
     
     @classmethod
     def from_openai_format(cls, message_data: Dict[str, Any], chat_id: uuid.UUID, sequence: int) -> "Message":
         """Create a Message instance from OpenAI API format."""
-        role = MessageRole(message_data["role"])
+        try:
+            role = _MESSAGE_ROLES_BY_VALUE[message_data["role"]]
+        except KeyError:
+            raise ValueError(f"{message_data['role']!r} is not a valid MessageRole")
         content = message_data.get("content")
         
         if role == MessageRole.SYSTEM:
@@ -253,45 +391,62 @@ class Message(Base):
         else:
             raise ValueError(f"Unsupported message role: {role}")
     
-    def to_openai_format(self) -> Dict[str, Any]:
-        """Convert the message to OpenAI API compatible format."""
-        result = {"role": self.role.value}
+    @classmethod
+    def bulk_append(cls, db: Session, chat_id: uuid.UUID, messages_data: List[Dict[str, Any]]) -> int:
+        """Append OpenAI-format messages after the chat's last sequence in one statement.
         
-        if self.role == MessageRole.SYSTEM:
-            # Get content list and extract text
-            content_list = self._content.get("content", [])
-            text_items = [item.get("text", "") for item in content_list if item.get("type") == "text"]
-            result["content"] = " ".join(text_items)
+        The messages are validated like from_openai_format, then written with a single
+        INSERT ... SELECT that numbers them from the current max sequence. The caller
+        commits.
         
-        elif self.role == MessageRole.USER:
-            # Handle content with attachments
-            content_list = self._content.get("content", [])
-            
-            # Process any attachments
-            if self.attachments:
-                content_list = self._process_attachments(content_list)
-            
-            # OpenAI API accepts either a string or structured content
-            if len(content_list) == 1 and content_list[0].get("type") == "text":
-                result["content"] = content_list[0].get("text", "")
-            else:
-                result["content"] = content_list
+        Returns:
+            int: Number of messages inserted
+        """
+        if not messages_data:
+            return 0
         
-        elif self.role == MessageRole.ASSISTANT:
-            content_list = self._content.get("content", [])
-            text_items = [item.get("text", "") for item in content_list if item.get("type") == "text"]
-            result["content"] = " ".join(text_items)
-            
-            # Add tool_calls if present
-            if "tool_calls" in self._content:
-                result["tool_calls"] = self._content["tool_calls"]
+        rows = []
+        for position, message_data in enumerate(messages_data, start=1):
+            message = cls.from_openai_format(message_data, chat_id, position)
+            rows.append((position, uuid.uuid4(), message.role, message._content, message.text_cache))
         
-        elif self.role == MessageRole.TOOL:
-            content_list = self._content.get("content", [])
-            text_items = [item.get("text", "") for item in content_list if item.get("type") == "text"]
-            result["content"] = " ".join(text_items)
-            result["tool_call_id"] = self._content.get("tool_call_id")
+        new_messages = values(
+            column("position", Integer),
+            column("id", UUID(as_uuid=True)),
+            column("role", MessageRoleType()),
+            column("content_json", JSONB),
+            column("text_cache", Text),
+            name="new_message",
+        ).data(rows)
+        last_sequence = (
+            select(func.coalesce(func.max(cls.sequence), 0))
+            .where(cls.chat_id == chat_id)
+            .scalar_subquery()
+        )
+        now = datetime.utcnow()
         
+        # PostgreSQL types the untyped VALUES parameters as text, which it won't assign to
+        #  uuid or jsonb columns without an explicit cast
+        stmt = insert(cls.__table__).from_select(
+            ["id", "chat_id", "role", "sequence", "content_json", "text_cache", "created_at", "updated_at"],
+            select(
+                cast(new_messages.c.id, UUID(as_uuid=True)),
+                literal(chat_id, UUID(as_uuid=True)),
+                new_messages.c.role,
+                last_sequence + new_messages.c.position,
+                cast(new_messages.c.content_json, JSONB),
+                new_messages.c.text_cache,
+                literal(now, cls.created_at.type),
+                literal(now, cls.updated_at.type),
+            ),
+        )
+        return db.execute(stmt).rowcount
+    
+    def to_openai_format(self) -> Dict[str, Any]:
+        """Convert the message to OpenAI API compatible format."""
+        role = self.role
+        result = {"role": role}  # MessageRole is a str, serialized as its value
+        _OPENAI_FORMATTERS[role](self, self._content or {}, result)
         return result
     
     def _process_attachments(self, base_content: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
@@ -299,47 +454,8 @@ class Message(Base):
         content_list = list(base_content) if base_content else []
         
         for attachment in self.attachments:
-            file_type = MIME_TYPE_MAP.get(attachment.file_type, FileType.OTHER)
-            
-            if file_type == FileType.IMAGE:
-                # Convert image to base64
-                try:
-                    with open(attachment.file_path, "rb") as image_file:
-                        base64_image = base64.b64encode(image_file.read()).decode('utf-8')
-                        content_list.append({
-                            'type': 'image_url',
-                            'image_url': {
-                                'url': f"data:{attachment.file_type};base64,{base64_image}"
-                            }
-                        })
-                except Exception as e:
-                    content_list.append({
-                        'type': 'text',
-                        'text': f"[Image: {attachment.filename} (could not be loaded: {str(e)})]"
-                    })
-            
-            elif file_type == FileType.AUDIO:
-                # Handle audio
-                try:
-                    with open(attachment.file_path, "rb") as audio_file:
-                        base64_audio = base64.b64encode(audio_file.read()).decode('utf-8')
-                        content_list.append({
-                            'type': 'text',
-                            'text': f"[Audio data in base64: {base64_audio[:20]}...]"
-                        })
-                except Exception as e:
-                    content_list.append({
-                        'type': 'text',
-                        'text': f"[Audio: {attachment.filename} (could not be loaded: {str(e)})]"
-                    })
-            
-            else:
-                # For other file types
-                file_size_mb = attachment.file_size / (1024 * 1024) if attachment.file_size else "unknown"
-                content_list.append({
-                    'type': 'text',
-                    'text': f"[File: {attachment.filename}, Type: {attachment.file_type}, Size: {file_size_mb:.2f}MB]"
-                })
+            formatter = _ATTACHMENT_FORMATTERS.get(attachment.file_category, _format_file_attachment)
+            content_list.append(formatter(attachment))
         
         return content_list
     
@@ -351,11 +467,12 @@ class Message(Base):
         Returns a plain text string if there's only one text item,
         otherwise returns the full content list.
         """
-        if not self._content:
+        content_data = self._content
+        if not content_data:
             return ""
         
         # Get the content list from the unified structure
-        content_list = self._content.get("content", [])
+        content_list = content_data.get("content", [])
         
         # If there's just one text item, return it as a string for simplicity
         if len(content_list) == 1 and content_list[0].get("type") == "text":
@@ -366,21 +483,25 @@ class Message(Base):
     @property
     def tool_calls(self) -> Optional[List[Dict[str, Any]]]:
         """Get tool calls if available."""
-        if not self._content:
-            return None
-        return self._content.get("tool_calls")
+        content_data = self._content
+        return content_data.get("tool_calls") if content_data else None
     
     @property
     def tool_call_id(self) -> Optional[str]:
         """Get tool call ID if available."""
-        if not self._content:
-            return None
-        return self._content.get("tool_call_id")
+        # The generated column mirrors the stored content, so it can be read without the
+        #  deferred JSONB body; before the row is written, or while new content is pending,
+        #  only the content has the current id
+        state = inspect(self)
+        if state.has_identity and not state.attrs._content.history.has_changes():
+            return self._tool_call_id
+        content_data = self._content
+        return content_data.get("tool_call_id") if content_data else None
     
     @validates('_content')
     def validate_content(self, key, value):
         """Validate content format based on role."""
-        if not value:
+        if not value or _trusted_content.get():
             return value
         
         # All messages should have a content field with an array
@@ -399,19 +520,10 @@ class Message(Base):
                 
         elif self.role == MessageRole.USER:
             # User messages should be a list of valid content items
-            for item in content_list:
-                try:
-                    content_type = item.get("type")
-                    if content_type == "text":
-                        TextContent(**item)
-                    elif content_type == "image_url":
-                        ImageUrlContent(**item)
-                    elif content_type == "input_audio":
-                        AudioContent(**item)
-                    else:
-                        raise ValueError(f"Unknown content type: {content_type}")
-                except Exception as e:
-                    raise ValueError(f"Invalid content item: {str(e)}")
+            try:
+                _CONTENT_LIST_ADAPTER.validate_python(content_list)
+            except ValidationError as e:
+                raise ValueError(f"Invalid content item: {str(e)}")
         
         elif self.role == MessageRole.ASSISTANT:
             # Assistant messages must have at least one text content item
@@ -420,14 +532,12 @@ class Message(Base):
             
             # Validate tool_calls if present
             if "tool_calls" in value:
+                tool_calls = value["tool_calls"]
+                if not isinstance(tool_calls, list):
+                    raise ValueError("Invalid tool calls: tool_calls must be a list")
                 try:
-                    tool_calls = value["tool_calls"]
-                    if not isinstance(tool_calls, list):
-                        raise ValueError("tool_calls must be a list")
-                    
-                    for call_data in tool_calls:
-                        ToolCall(**call_data)
-                except Exception as e:
+                    _TOOL_CALLS_ADAPTER.validate_python(tool_calls)
+                except ValidationError as e:
                     raise ValueError(f"Invalid tool calls: {str(e)}")
         
         elif self.role == MessageRole.TOOL:
@@ -435,24 +545,123 @@ class Message(Base):
             if "tool_call_id" not in value:
                 raise ValueError("Tool message must have 'tool_call_id' field")
             
-            # Tool message content must be text only
-            for item in content_list:
-                try:
-                    content_type = item.get("type")
-                    if content_type != "text":
-                        raise ValueError(f"Tool message only supports text content type, got: {content_type}")
-                    TextContent(**item)
-                except Exception as e:
-                    raise ValueError(f"Invalid content item: {str(e)}")
-                
+            # Tool message content must be text only (TextContent only accepts type "text")
+            try:
+                _TEXT_CONTENT_LIST_ADAPTER.validate_python(content_list)
+            except ValidationError as e:
+                raise ValueError(f"Invalid content item: {str(e)}")
+        
+        # Content set outside the factories keeps the text cache in step
+        self.text_cache = _join_text_items(content_list)
         return value
 
 
+# Role-specific parts of Message.to_openai_format. Each formatter receives the message,
+#  its raw content dict and the result dict to fill in.
+def _join_text_items(content_list: List[Dict[str, Any]]) -> str:
+    return " ".join(item.get("text", "") for item in content_list if item.get("type") == "text")
+
+
+def _message_text(message: Message, content_data: Dict[str, Any]) -> str:
+    # Rows written before text_cache existed fall back to joining the content
+    text_cache = message.text_cache
+    if text_cache is not None:
+        return text_cache
+    return _join_text_items(content_data.get("content", []))
+
+
+def _format_text_message(message: Message, content_data: Dict[str, Any], result: Dict[str, Any]) -> None:
+    result["content"] = _message_text(message, content_data)
+
+
+def _format_user_message(message: Message, content_data: Dict[str, Any], result: Dict[str, Any]) -> None:
+    content_list = content_data.get("content", [])
+    
+    # Process any attachments
+    if message.attachments:
+        content_list = message._process_attachments(content_list)
+    
+    # OpenAI API accepts either a string or structured content
+    if len(content_list) == 1 and content_list[0].get("type") == "text":
+        result["content"] = content_list[0].get("text", "")
+    else:
+        result["content"] = content_list
+
+
+def _format_assistant_message(message: Message, content_data: Dict[str, Any], result: Dict[str, Any]) -> None:
+    result["content"] = _message_text(message, content_data)
+    
+    # Add tool_calls if present
+    if "tool_calls" in content_data:
+        result["tool_calls"] = content_data["tool_calls"]
+
+
+def _format_tool_message(message: Message, content_data: Dict[str, Any], result: Dict[str, Any]) -> None:
+    result["content"] = _message_text(message, content_data)
+    result["tool_call_id"] = content_data.get("tool_call_id")
+
+
+_OPENAI_FORMATTERS = {
+    MessageRole.SYSTEM: _format_text_message,
+    MessageRole.USER: _format_user_message,
+    MessageRole.ASSISTANT: _format_assistant_message,
+    MessageRole.TOOL: _format_tool_message,
+}
+
+
+# Per-category content items for Message._process_attachments
+def _format_image_attachment(attachment: "Attachment") -> Dict[str, Any]:
+    # Convert image to a base64 data URL, reused across turns while the file is unchanged
+    try:
+        data_url = attachment_cache.get_data_url(attachment.file_path, attachment.file_type)
+    except Exception as e:
+        return {
+            'type': 'text',
+            'text': f"[Image: {attachment.filename} (could not be loaded: {str(e)})]"
+        }
+    return {
+        'type': 'image_url',
+        'image_url': {
+            'url': data_url
+        }
+    }
+
+
+def _format_audio_attachment(attachment: "Attachment") -> Dict[str, Any]:
+    try:
+        # Only a 20-character preview is shown, which is exactly the first 15 bytes
+        base64_audio = encode_file_base64(attachment.file_path, limit=15)
+    except Exception as e:
+        return {
+            'type': 'text',
+            'text': f"[Audio: {attachment.filename} (could not be loaded: {str(e)})]"
+        }
+    return {
+        'type': 'text',
+        'text': f"[Audio data in base64: {base64_audio}...]"
+    }
+
+
+def _format_file_attachment(attachment: "Attachment") -> Dict[str, Any]:
+    # For other file types
+    file_size = f"{attachment.file_size / (1024 * 1024):.2f}MB" if attachment.file_size else "unknown"
+    return {
+        'type': 'text',
+        'text': f"[File: {attachment.filename}, Type: {attachment.file_type}, Size: {file_size}]"
+    }
+
+
+_ATTACHMENT_FORMATTERS = {
+    FileType.IMAGE: _format_image_attachment,
+    FileType.AUDIO: _format_audio_attachment,
+}
+
+
 class Attachment(Base):
     """Model representing a file attachment linked to a message."""
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    message_id = Column(UUID(as_uuid=True), ForeignKey("message.id"), nullable=False)
+    message_id = Column(UUID(as_uuid=True), ForeignKey("message.id", ondelete="CASCADE"), nullable=False, index=True)
     
     # File metadata
     filename = Column(String(255), nullable=False)
@@ -466,9 +675,9 @@ class Attachment(Base):
     # Relationships
     message = relationship("Message", back_populates="attachments") 
     
-    @property
+    @cached_property
     def file_category(self) -> FileType:
-        """Get the file category based on MIME type."""
+        """Get the file category based on MIME type (computed once per instance)."""
         return MIME_TYPE_MAP.get(self.file_type, FileType.OTHER)
         
     def model_dump(self):
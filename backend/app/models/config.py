@@ -3,6 +3,7 @@ from typing import Any, Dict, Optional
 
 from sqlalchemy import Column, ForeignKey, String
 from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy.ext.mutable import MutableDict
 from sqlalchemy.orm import relationship
 
 from app.models.base import Base
@@ -12,10 +13,11 @@ class UserConfig(Base):
     """User-specific configuration settings."""
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     
-    # Preferences stored as JSON
-    preferences = Column(JSONB, nullable=False, default=dict)
+    # Preferences stored as JSON. MutableDict flags the row dirty on in-place changes to
+    #  top-level keys, so single preferences can be set without rebuilding the dict
+    preferences = Column(MutableDict.as_mutable(JSONB), nullable=False, default=dict)
     
     # Relationships
     user = relationship("User", back_populates="configs")
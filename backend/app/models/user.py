@@ -29,11 +29,12 @@ class User(Base):
     is_verified = Column(Boolean, default=False)
     
     # Relationships
-    chats = relationship("Chat", back_populates="user", cascade="all, delete-orphan")
-    login_audits = relationship("LoginAudit", back_populates="user", cascade="all, delete-orphan")
-    verification_tokens = relationship("VerificationToken", back_populates="user", cascade="all, delete-orphan")
-    password_reset_tokens = relationship("PasswordResetToken", back_populates="user", cascade="all, delete-orphan")
-    configs = relationship("UserConfig", back_populates="user", cascade="all, delete-orphan")
+    # passive_deletes leaves child rows to the ON DELETE CASCADE foreign keys
+    chats = relationship("Chat", back_populates="user", cascade="all, delete-orphan", passive_deletes=True)
+    login_audits = relationship("LoginAudit", back_populates="user", cascade="all, delete-orphan", passive_deletes=True)
+    verification_tokens = relationship("VerificationToken", back_populates="user", cascade="all, delete-orphan", passive_deletes=True)
+    password_reset_tokens = relationship("PasswordResetToken", back_populates="user", cascade="all, delete-orphan", passive_deletes=True)
+    configs = relationship("UserConfig", back_populates="user", cascade="all, delete-orphan", passive_deletes=True)
 
     # Add check constraint for role
     __table_args__ = (
@@ -46,7 +47,7 @@ class VerificationToken(Base):
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     token = Column(String(255), nullable=False, index=True)
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)  # Updated foreign key reference
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)  # Updated foreign key reference
     expires_at = Column(DateTime, nullable=False, default=lambda: datetime.utcnow() + timedelta(hours=24))
     
     # Relationships
@@ -58,7 +59,7 @@ class PasswordResetToken(Base):
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     token = Column(String(255), nullable=False, index=True)
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)  # Updated foreign key reference
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)  # Updated foreign key reference
     expires_at = Column(DateTime, nullable=False, default=lambda: datetime.utcnow() + timedelta(hours=1))
     
     # Relationships
@@ -69,7 +70,7 @@ class LoginAudit(Base):
     """Tracks user login activity for security purposes."""
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)  # Updated foreign key reference
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)  # Updated foreign key reference
     ip_address = Column(String(45), nullable=False)  # IPv6 can be up to 45 chars
     user_agent = Column(String(255))
     success = Column(Boolean, default=True)
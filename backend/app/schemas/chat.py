@@ -36,7 +36,9 @@ class Attachment(AttachmentInDBBase):
 # Message schemas
 class MessageBase(BaseModel):
     role: MessageRole = Field(..., description="The role of the message sender (system, user, assistant, tool)")
-    content: Union[str, List[Dict[str, Any]]] = Field(..., description="The content of the message (text or structured data)")
+    content: Union[str, List[Dict[str, Any]]] = Field(
+        ..., union_mode="left_to_right", description="The content of the message (text or structured data)"
+    )
     reasoning_content: Optional[str] = Field(None, description="Optional reasoning content for the message")
     sequence: int = Field(..., description="The sequence number of the message in the chat")
     tokens: Optional[int] = Field(None, description="The token count of the message")
@@ -56,10 +58,14 @@ class MessageUpdate(BaseModel):
 class MessageResendUpdate(BaseModel):
     new_content: str = Field(..., description="The new content for the message to be updated")
 
+    model_config = ConfigDict(defer_build=True)
+
 
 class UserMessageRequest(BaseModel):
     role: MessageRole = Field(MessageRole.USER, description="The role of the message sender (only user supported)")
-    content: Union[str, List[Dict[str, Any]]] = Field(..., description="The content of the message (text or structured data)")
+    content: Union[str, List[Dict[str, Any]]] = Field(
+        ..., union_mode="left_to_right", description="The content of the message (text or structured data)"
+    )
     sequence: Optional[int] = Field(None, description="Sequence number for editing existing messages")
     reasoning_content: Optional[str] = Field(None, description="Optional reasoning content")
     message_metadata: Optional[Dict[str, Any]] = Field(None, description="Additional metadata for the message")
@@ -110,6 +116,8 @@ class Chat(ChatInDBBase):
 class ChatList(BaseModel):
     chats: List[Chat] = []
 
+    model_config = ConfigDict(defer_build=True)
+
 
 # For streaming responses
 class StreamingResponse(BaseModel):
@@ -60,4 +60,6 @@ class SystemConfig(SystemConfigInDBBase):
 
 
 class SystemConfigList(BaseModel):
-    configs: List[SystemConfig] = [] 
\ No newline at end of file
+    configs: List[SystemConfig] = []
+
+    model_config = ConfigDict(defer_build=True)
@@ -1,7 +1,7 @@
 import uuid
 from typing import List, Optional, Literal
 
-from pydantic import BaseModel, EmailStr, Field, UUID4, field_validator, ConfigDict
+from pydantic import BaseModel, EmailStr, Field, UUID4, ConfigDict
 
 
 # Shared properties
@@ -18,15 +18,10 @@ class UserBase(BaseModel):
 # Properties to receive via API on creation
 class UserCreate(BaseModel):
     email: EmailStr
-    username: str
+    # Alphanumeric (letters or digits, no underscore), checked by pydantic-core itself
+    username: str = Field(..., pattern=r"^[^\W_]+$", max_length=50)
     password: str
     full_name: Optional[str] = None
-    
-    @field_validator('username')
-    def username_alphanumeric(cls, v):
-        if not v.isalnum():
-            raise ValueError('must be alphanumeric')
-        return v
 
 
 # Properties to receive via API on update
@@ -59,10 +54,14 @@ class Token(BaseModel):
     access_token: str
     token_type: str = "bearer"
 
+    model_config = ConfigDict(defer_build=True)
+
 
 class TokenPayload(BaseModel):
     sub: Optional[str] = None
 
+    model_config = ConfigDict(defer_build=True)
+
 
 # Login schemas
 class Login(BaseModel):
@@ -74,6 +73,8 @@ class Login(BaseModel):
 class PasswordReset(BaseModel):
     email: EmailStr
 
+    model_config = ConfigDict(defer_build=True)
+
 
 class PasswordResetConfirm(BaseModel):
     token: str
@@ -82,4 +83,6 @@ class PasswordResetConfirm(BaseModel):
 
 # Email verification schemas
 class EmailVerify(BaseModel):
-    token: str 
\ No newline at end of file
+    token: str
+
+    model_config = ConfigDict(defer_build=True)
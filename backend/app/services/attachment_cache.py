@@ -0,0 +1,98 @@
+import base64
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from app.core.config import settings
+
+
+# Read size for streaming base64 encoding, a multiple of 3 so chunks encode without padding
+BASE64_CHUNK_SIZE = 3 * 64 * 1024
+
+
+def encode_file_base64(file_path: str, limit: Optional[int] = None) -> str:
+    """Base64-encode a file chunk by chunk instead of reading it into memory whole.
+    
+    Args:
+        file_path: Path of the file to encode
+        limit: Optional maximum number of bytes to read from the start of the file
+    """
+    encoded = bytearray()
+    remaining = limit
+    with open(file_path, "rb") as f:
+        while remaining is None or remaining > 0:
+            size = BASE64_CHUNK_SIZE if remaining is None else min(BASE64_CHUNK_SIZE, remaining)
+            chunk = f.read(size)
+            if not chunk:
+                break
+            encoded += base64.b64encode(chunk)
+            if remaining is not None:
+                remaining -= len(chunk)
+    return encoded.decode("ascii")
+
+
+class AttachmentCache:
+    """Process-wide LRU cache of attachment data URLs, bounded by their total size.
+    
+    Entries are keyed by file path and only reused while the file's mtime and size
+    are unchanged, so a replaced file is re-encoded on the next lookup.
+    """
+    
+    def __init__(self, max_bytes: int):
+        """Initialize an empty cache holding at most `max_bytes` of data URLs."""
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[int, int, str, str]]" = OrderedDict()
+        self._total_bytes = 0
+        # Messages are formatted in worker threads, so guard the shared state
+        self._lock = threading.Lock()
+    
+    def get_data_url(self, file_path: str, mime_type: str) -> str:
+        """
+        Get the base64 `data:` URL for a file, encoding it only on a cache miss.
+        
+        Args:
+            file_path: Path of the attachment file
+            mime_type: MIME type to put in the data URL
+            
+        Returns:
+            str: The `data:<mime_type>;base64,...` URL
+        """
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            self.invalidate(file_path)
+            raise
+        
+        with self._lock:
+            entry = self._entries.get(file_path)
+            if entry is not None and entry[:3] == (stat.st_mtime_ns, stat.st_size, mime_type):
+                self._entries.move_to_end(file_path)
+                return entry[3]
+        
+        data_url = f"data:{mime_type};base64,{encode_file_base64(file_path)}"
+        
+        # Don't let a single oversized file flush the whole cache
+        if len(data_url) > self.max_bytes:
+            return data_url
+        
+        with self._lock:
+            old_entry = self._entries.pop(file_path, None)
+            if old_entry is not None:
+                self._total_bytes -= len(old_entry[3])
+            self._entries[file_path] = (stat.st_mtime_ns, stat.st_size, mime_type, data_url)
+            self._total_bytes += len(data_url)
+            while self._total_bytes > self.max_bytes:
+                _, (_, _, _, evicted) = self._entries.popitem(last=False)
+                self._total_bytes -= len(evicted)
+        return data_url
+    
+    def invalidate(self, file_path: str) -> None:
+        """Drop the cached data URL for a file, if any."""
+        with self._lock:
+            entry = self._entries.pop(file_path, None)
+            if entry is not None:
+                self._total_bytes -= len(entry[3])
+
+
+attachment_cache = AttachmentCache(settings.ATTACHMENT_CACHE_MAX_BYTES)
@@ -1,29 +1,78 @@
+import asyncio
+import hashlib
+import itertools
 import os
+import time
 import uuid
-import shutil
 import mimetypes
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
-from typing import BinaryIO, Optional, Tuple, List
+from typing import Any, BinaryIO, Dict, NamedTuple, Optional, Tuple, List
 
 from fastapi import UploadFile, HTTPException, status
+from fastapi.logger import logger
 
 from app.core.config import settings
+from app.services.attachment_cache import attachment_cache
+
+
+# Read size for streaming uploads to disk
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Per-process counter that, with the time and pid, keeps stored file names unique
+_upload_seq = itertools.count()
+
+# Load the MIME type database at import rather than on the first upload
+mimetypes.init()
+
+
+@lru_cache(maxsize=256)
+def _mime_for_ext(extension: str) -> str:
+    """MIME type for a lowercase file extension, falling back to application/<extension>."""
+    return mimetypes.types_map.get(f".{extension}") or f"application/{extension}"
+
+
+def _write_chunk(buffer: BinaryIO, hasher: Any, chunk: bytes) -> None:
+    """Hash a chunk of an upload and append it to the stored file."""
+    hasher.update(chunk)
+    buffer.write(chunk)
+
+
+class SavedFile(NamedTuple):
+    """Metadata about a file written by FileStorageService.save_file."""
+    filename: str  # Original filename
+    file_path: str  # Path where file is stored
+    file_type: str  # MIME type
+    file_size: int  # Size in bytes
+    attachment_metadata: Dict[str, Any]  # Content hash
+
+
+@lru_cache(maxsize=12)
+def _ensure_month_dir(year: int, month: int) -> str:
+    """Create the upload subdirectory for a year/month once and return its path."""
+    path = os.path.join(settings.UPLOAD_DIR, f"{year}/{month:02d}")
+    os.makedirs(path, exist_ok=True)
+    return path
 
 
 class FileStorageService:
     """Service for handling file storage operations."""
     
     def __init__(self):
-        """Initialize the service and ensure upload directory exists."""
-        # Ensure the upload directory exists
-        os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
+        """Initialize the service with the allowed extensions as a set."""
+        self._allowed_extensions = frozenset(settings.ALLOWED_EXTENSIONS)
+        self._extension_error = f"File type not allowed. Allowed types: {', '.join(settings.ALLOWED_EXTENSIONS)}"
+    
+    @property
+    def upload_path(self) -> str:
+        """Directory for new uploads, organized in year/month subdirectories.
         
-        # Create year/month subdirectories for better organization
+        Resolved on each save so a long-running process moves on to the next month,
+        while the directory itself is only created once per month.
+        """
         current_date = datetime.now()
-        year_month = f"{current_date.year}/{current_date.month:02d}"
-        self.upload_path = os.path.join(settings.UPLOAD_DIR, year_month)
-        os.makedirs(self.upload_path, exist_ok=True)
+        return _ensure_month_dir(current_date.year, current_date.month)
     
     def get_file_extension(self, filename: str) -> str:
         """Get the file extension from the filename."""
@@ -33,21 +82,15 @@ class FileStorageService:
         """
         Validate if the uploaded file meets the requirements.
         
+        The size limit is enforced while the file is written, see save_file.
+        
         Returns:
             Tuple[bool, Optional[str]]: (is_valid, error_message)
         """
-        # Check file size
-        file.file.seek(0, os.SEEK_END)
-        file_size = file.file.tell()
-        file.file.seek(0)  # Reset file position
-        
-        if file_size > settings.MAX_UPLOAD_SIZE:
-            return False, f"File too large. Maximum size is {settings.MAX_UPLOAD_SIZE / 1024 / 1024} MB"
-        
         # Check file extension
         extension = self.get_file_extension(file.filename)
-        if extension not in settings.ALLOWED_EXTENSIONS:
-            return False, f"File type not allowed. Allowed types: {', '.join(settings.ALLOWED_EXTENSIONS)}"
+        if extension not in self._allowed_extensions:
+            return False, self._extension_error
         
         return True, None
     
@@ -55,7 +98,7 @@ class FileStorageService:
         """Check if a file exists in the storage."""
         return os.path.exists(file_path)
     
-    async def save_file(self, file: UploadFile, message_id: uuid.UUID) -> dict:
+    async def save_file(self, file: UploadFile, message_id: uuid.UUID) -> SavedFile:
         """
         Save an uploaded file to storage.
         
@@ -64,7 +107,7 @@ class FileStorageService:
             message_id: The ID of the message this file is attached to
             
         Returns:
-            dict: Metadata about the saved file
+            SavedFile: Metadata about the saved file
         """
         # Validate file
         is_valid, error_message = self.is_valid_file(file)
@@ -74,25 +117,53 @@ class FileStorageService:
                 detail=error_message
             )
         
-        # Generate a unique filename to prevent collisions
+        # Generate a unique filename to prevent collisions. The message_id prefix is already
+        #  a UUID, so time, pid and counter are enough to tell its files apart.
         extension = self.get_file_extension(file.filename)
-        unique_filename = f"{message_id}_{uuid.uuid4()}.{extension}"
+        unique_filename = f"{message_id}_{time.time_ns():x}-{os.getpid():x}-{next(_upload_seq):x}.{extension}"
         file_path = os.path.join(self.upload_path, unique_filename)
         
-        # Save the file
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        # Save the file chunk by chunk, sizing and hashing it in the same pass. UploadFile
+        #  reads already go through the threadpool; hash and write each chunk there too so
+        #  the disk writes don't block the event loop.
+        file_size = 0
+        hasher = hashlib.blake2b(digest_size=16)
+        try:
+            with open(file_path, "wb") as buffer:
+                while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                    file_size += len(chunk)
+                    if file_size > settings.MAX_UPLOAD_SIZE:
+                        raise HTTPException(
+                            status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=f"File too large. Maximum size is {settings.MAX_UPLOAD_SIZE / 1024 / 1024} MB"
+                        )
+                    await asyncio.to_thread(_write_chunk, buffer, hasher, chunk)
+        except BaseException:
+            # Don't leave a partial file behind
+            if os.path.exists(file_path):
+                os.remove(file_path)
+            raise
         
         # Get file metadata
-        file_size = os.path.getsize(file_path)
-        mime_type, _ = mimetypes.guess_type(file_path)
+        file_type = _mime_for_ext(extension)
+        
+        # Images are sent to the LLM as base64 data URLs on every turn; encode once now,
+        #  off the event loop, to warm the attachment cache. The cache is per process, so
+        #  with several workers this only helps when the next chat turn lands on this one.
+        #  It's only an optimisation: a failed encode is logged and left to the next read.
+        if file_type.startswith("image/"):
+            try:
+                await asyncio.to_thread(attachment_cache.get_data_url, file_path, file_type)
+            except Exception:
+                logger.warning(f"Could not prewarm the attachment cache for {file_path}", exc_info=True)
         
-        return {
-            "filename": file.filename,  # Original filename
-            "file_path": file_path,  # Path where file is stored
-            "file_type": mime_type or f"application/{extension}",  # MIME type
-            "file_size": file_size,  # Size in bytes
-        }
+        return SavedFile(
+            filename=file.filename,
+            file_path=file_path,
+            file_type=file_type,
+            file_size=file_size,
+            attachment_metadata={"blake2b": hasher.hexdigest()},
+        )
     
     def get_file_path(self, file_path: str) -> str:
         """
@@ -117,6 +188,7 @@ class FileStorageService:
             bool: True if file was deleted, False otherwise
         """
         try:
+            attachment_cache.invalidate(file_path)
             if os.path.exists(file_path):
                 os.remove(file_path)
                 return True
@@ -1,12 +1,14 @@
 import asyncio
-from typing import Any, Dict, List, AsyncGenerator, Optional
+from typing import Any, Dict, List, AsyncGenerator, AsyncIterator, Optional
 
 from app.core.config import settings
 
 
 async def generate_llm_response(
     messages: List[Dict[str, str]],
-    model: Optional[str] = None
+    model: Optional[str] = None,
+    *,
+    last_user_content: Optional[str] = None,
 ) -> AsyncGenerator[str, None]:
     """
     Generate a response from the LLM.
@@ -17,6 +19,7 @@ async def generate_llm_response(
     Args:
         messages: A list of message dictionaries with 'role' and 'content'
         model: Optional model name to use for generation (defaults to settings.LLM_MODEL)
+        last_user_content: Text of the user message that triggered this response
         
     Yields:
         Tokens of the generated response
@@ -52,18 +55,78 @@ async def generate_llm_response(
     # Mock response
     response_text = f"This is a simulated response from the AI using model: {model_to_use}. In a real implementation, this would be an actual response from an LLM API like OpenAI, Anthropic, or a local model."
     
-    # Get the last user message for context in our mock response
-    last_message = next((m for m in reversed(messages) if m["role"] == "user"), None)
-    if last_message:
-        if isinstance(last_message['content'], list):
-            last_message_content = last_message['content'][0]['text']
-        else:
-            last_message_content = last_message['content']
-        response_text += f"\n\nYou asked: {last_message_content[:30]}..."
+    # Echo the triggering user message for context in our mock response
+    if last_user_content:
+        response_text += f"\n\nYou asked: {last_user_content[:30]}..."
     
     # Simulate streaming by yielding parts of the response with delays
     words = response_text.split()
     for i in range(0, len(words), 3):
         chunk = " ".join(words[i:i+3]) + " "
         yield chunk
-        await asyncio.sleep(0.1)  # Simulate thinking 
\ No newline at end of file
+        await asyncio.sleep(0.1)  # Simulate thinking 
+
+
+async def coalesce_tokens(
+    tokens: AsyncIterator[str],
+    min_chunk_chars: int = 64,
+    max_delay: float = 0.025,
+) -> AsyncGenerator[str, None]:
+    """
+    Merge a token stream into larger chunks.
+    
+    A chunk is emitted once it holds `min_chunk_chars` characters, or `max_delay` seconds
+    after its first token arrived, whichever comes first. Fast streams then produce far
+    fewer SSE frames and database updates, while slow ones are not held back.
+    
+    Args:
+        tokens: The token stream to merge, e.g. from generate_llm_response
+        min_chunk_chars: Size at which a chunk is emitted right away
+        max_delay: Longest time in seconds a token waits in the buffer
+        
+    Yields:
+        Chunks of consecutive tokens
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    end = object()
+    
+    async def produce():
+        try:
+            async for token in tokens:
+                await queue.put(token)
+        finally:
+            await queue.put(end)
+    
+    loop = asyncio.get_running_loop()
+    producer = asyncio.create_task(produce())
+    try:
+        buffer: List[str] = []
+        size = 0
+        deadline = 0.0
+        while True:
+            if buffer:
+                try:
+                    item = await asyncio.wait_for(queue.get(), max(deadline - loop.time(), 0))
+                except asyncio.TimeoutError:
+                    yield "".join(buffer)
+                    buffer, size = [], 0
+                    continue
+            else:
+                item = await queue.get()
+            
+            if item is end:
+                break
+            if not buffer:
+                deadline = loop.time() + max_delay
+            buffer.append(item)
+            size += len(item)
+            if size >= min_chunk_chars:
+                yield "".join(buffer)
+                buffer, size = [], 0
+        
+        if buffer:
+            yield "".join(buffer)
+        # Surface any error raised by the token stream
+        await producer
+    finally:
+        producer.cancel()
@@ -21,7 +21,6 @@ import os
 import sys
 from pathlib import Path
 import subprocess
-import tempfile
 
 # Add the current directory to the Python path
 sys.path.append(str(Path(__file__).parent))
@@ -38,65 +37,58 @@ def generate_schema_diagram(output_file='alembic_schema.png', dpi=300):
     """
     print(f"Generating database schema diagram to {output_file} at {dpi} DPI...")
     
-    # Create temporary DOT file
-    with tempfile.NamedTemporaryFile(suffix='.dot', delete=False) as tmp:
-        dot_file = tmp.name
+    # Generate DOT file from SQLAlchemy metadata, collecting the parts in a list
+    parts = ["""
+    digraph G {
+        rankdir=LR;
+        node [shape=record, fontname="Helvetica", fontsize=10];
+        edge [fontname="Helvetica", fontsize=8];
+        
+        // Database schema from SQLAlchemy models
+    """]
+    tables = Base.metadata.sorted_tables
     
-    try:
-        # Generate DOT file from SQLAlchemy metadata
-        dot_content = """
-        digraph G {
-            rankdir=LR;
-            node [shape=record, fontname="Helvetica", fontsize=10];
-            edge [fontname="Helvetica", fontsize=8];
+    # Add nodes (tables)
+    for table in tables:
+        attributes = []
+        for column in table.columns:
+            nullable = "" if column.nullable else " NOT NULL"
+            default = f" DEFAULT {column.default.arg}" if column.default and not callable(column.default.arg) else ""
+            pk = " PK" if column.primary_key else ""
             
-            // Database schema from SQLAlchemy models
-        """
-        
-        # Add nodes (tables)
-        for table in Base.metadata.sorted_tables:
-            attributes = []
-            for column in table.columns:
-                nullable = "" if column.nullable else " NOT NULL"
-                default = f" DEFAULT {column.default.arg}" if column.default and not callable(column.default.arg) else ""
-                pk = " PK" if column.primary_key else ""
-                
-                # Handle foreign keys more carefully
-                fk_info = ""
-                if column.foreign_keys:
-                    fk_refs = []
-                    for fk in column.foreign_keys:
-                        fk_refs.append(f"{fk.column.table.name}.{fk.column.name}")
-                    fk_info = f" FK→{', '.join(fk_refs)}"
-                
-                attributes.append(f"{column.name} : {column.type}{nullable}{default}{pk}{fk_info}")
+            # Handle foreign keys more carefully
+            fk_info = ""
+            if column.foreign_keys:
+                fk_refs = []
+                for fk in column.foreign_keys:
+                    fk_refs.append(f"{fk.column.table.name}.{fk.column.name}")
+                fk_info = f" FK→{', '.join(fk_refs)}"
             
-            attributes_str = "|".join(attributes)
-            dot_content += f'    {table.name} [label="{table.name}|{attributes_str}"];\n'
-        
-        # Add edges (foreign keys)
-        for table in Base.metadata.sorted_tables:
-            for column in table.columns:
-                if column.foreign_keys:
-                    for fk in column.foreign_keys:
-                        target_table = fk.column.table.name
-                        dot_content += f'    {table.name} -> {target_table} [label="{column.name} → {fk.column.name}"];\n'
+            attributes.append(f"{column.name} : {column.type}{nullable}{default}{pk}{fk_info}")
         
-        dot_content += "}"
-        
-        with open(dot_file, 'w') as f:
-            f.write(dot_content)
-            
-        # Convert DOT file to PNG using Graphviz with increased DPI
-        subprocess.run(['dot', '-Tpng', f'-Gdpi={dpi}', dot_file, '-o', output_file], check=True)
-        
-        print(f"Database schema diagram generated successfully at {output_file}")
-        print(f"Full path: {os.path.abspath(output_file)}")
+        attributes_str = "|".join(attributes)
+        parts.append(f'    {table.name} [label="{table.name}|{attributes_str}"];\n')
+    
+    # Add edges (foreign keys)
+    for table in tables:
+        for column in table.columns:
+            if column.foreign_keys:
+                for fk in column.foreign_keys:
+                    target_table = fk.column.table.name
+                    parts.append(f'    {table.name} -> {target_table} [label="{column.name} → {fk.column.name}"];\n')
+    
+    parts.append("}")
+    dot_content = "".join(parts)
+    
+    # Convert the DOT source to PNG using Graphviz with increased DPI, piped through stdin
+    subprocess.run(
+        ['dot', '-Tpng', f'-Gdpi={dpi}', '-o', output_file],
+        input=dot_content.encode('utf-8'),
+        check=True,
+    )
     
-    finally:
-        # Clean up temporary files
-        if os.path.exists(dot_file):
-            os.remove(dot_file)
+    print(f"Database schema diagram generated successfully at {output_file}")
+    print(f"Full path: {os.path.abspath(output_file)}")
 
 if __name__ == "__main__":
     # 
@@ -1,17 +1,26 @@
+import os
 import sys
 import uvicorn
+from app.core.config import settings
 from app.core.logging_config import configure_logging
 
 if __name__ == "__main__":
     # Configure logging before starting the application
     configure_logging()
     
-    # Start uvicorn with custom log config
+    # Reload is a development convenience; elsewhere run WEB_CONCURRENCY worker processes
+    is_dev = settings.ENV == "dev"
+    
+    # Start uvicorn with custom log config. With loop/http on "auto", uvicorn uses
+    #  uvloop and httptools when they are installed and falls back otherwise.
     uvicorn.run(
         "app.main:app",
         host="0.0.0.0",
         port=8000,
-        reload=True,
+        reload=is_dev,
+        workers=1 if is_dev else int(os.getenv("WEB_CONCURRENCY", "1")),
+        loop="auto",
+        http="auto",
         log_level="info",
         access_log=False,  # Disable uvicorn's default access log since we're handling it in our config
     ) 
\ No newline at end of file
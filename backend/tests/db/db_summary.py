@@ -9,7 +9,7 @@ This script verifies all the key aspects of the database setup:
 
 import os
 import sys
-from sqlalchemy import create_engine, inspect, Column, Integer, String, DateTime
+from sqlalchemy import create_engine, inspect, text, Column, Integer, String, DateTime
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime
@@ -38,13 +38,13 @@ def check_server_connection():
 def check_test_db_exists():
     """Check if test database exists"""
     try:
-        # Connect to default postgres database
-        engine = create_engine(DEFAULT_PG_URL)
+        # Connect to default postgres database, outside a transaction as CREATE DATABASE requires
+        engine = create_engine(DEFAULT_PG_URL, isolation_level="AUTOCOMMIT")
         inspector = inspect(engine)
         
         # Get list of databases
         conn = engine.connect()
-        result = conn.execute("SELECT datname FROM pg_database;")
+        result = conn.execute(text("SELECT datname FROM pg_database;"))
         databases = [row[0] for row in result]
         conn.close()
         
@@ -64,22 +64,22 @@ def check_test_db_exists():
 def create_test_db_if_not_exists():
     """Create test database if it doesn't exist"""
     try:
-        # Connect to default postgres database
-        engine = create_engine(DEFAULT_PG_URL)
+        # Connect to default postgres database, outside a transaction as CREATE DATABASE requires
+        engine = create_engine(DEFAULT_PG_URL, isolation_level="AUTOCOMMIT")
         
         # Get test database name
         test_db_name = TEST_DATABASE_URL.split('/')[-1]
         
         # Check if test database exists
         conn = engine.connect()
-        conn.execute("COMMIT")  # Close any open transactions
-        result = conn.execute(f"SELECT 1 FROM pg_database WHERE datname='{test_db_name}'")
+        result = conn.execute(
+            text("SELECT 1 FROM pg_database WHERE datname = :name"), {"name": test_db_name}
+        )
         exists = result.fetchone() is not None
         
         if not exists:
             # Create the database
-            conn.execute("COMMIT")
-            conn.execute(f'CREATE DATABASE {test_db_name}')
+            conn.execute(text(f'CREATE DATABASE "{test_db_name}"'))
             print(f"✅ Created test database '{test_db_name}'")
         else:
             print(f"ℹ️ Test database '{test_db_name}' already exists")
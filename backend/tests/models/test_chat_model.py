@@ -1,26 +1,17 @@
-import uuid
 import pytest
+from sqlalchemy import delete, event, func, select
 
-from app.models.user import User
-from app.models.chat import Chat, Message, MessageRole
+from app.crud.chat import chat as crud_chat
+from app.models.chat import Attachment, Chat, Message, MessageRole
 
 
 class TestChatModel:
-    def test_chat_creation(self, db_session):
+    def test_chat_creation(self, db_session, shared_user):
         """Test basic chat creation."""
-        # Create a user first
-        user = User(
-            email="test@example.com",
-            username="testuser",
-            hashed_password="hashedpassword123"
-        )
-        db_session.add(user)
-        db_session.commit()
-        
         # Create a chat
         chat = Chat(
             title="Test Chat",
-            user_id=user.id,
+            user_id=shared_user.id,
             model="gpt-4"
         )
         db_session.add(chat)
@@ -31,38 +22,29 @@ class TestChatModel:
         
         assert db_chat is not None
         assert db_chat.title == "Test Chat"
-        assert db_chat.user_id == user.id
+        assert db_chat.user_id == shared_user.id
         assert db_chat.model == "gpt-4"
         assert db_chat.is_archived is False
         
         # Check relationship
-        assert db_chat.user.username == "testuser"
+        assert db_chat.user.username == shared_user.username
         
         # Ensure timestamps are created
         assert db_chat.created_at is not None
         assert db_chat.updated_at is not None
     
-    def test_chat_with_no_title(self, db_session):
+    def test_chat_with_no_title(self, db_session, shared_user):
         """Test chat creation with no title."""
-        # Create a user first
-        user = User(
-            email="test@example.com",
-            username="testuser",
-            hashed_password="hashedpassword123"
-        )
-        db_session.add(user)
-        db_session.commit()
-        
         # Create a chat without title
         chat = Chat(
-            user_id=user.id,
+            user_id=shared_user.id,
             model="gpt-3.5-turbo"
         )
         db_session.add(chat)
         db_session.commit()
         
         # Query the chat back
-        db_chat = db_session.query(Chat).filter(Chat.user_id == user.id).first()
+        db_chat = db_session.query(Chat).filter(Chat.id == chat.id).first()
         
         assert db_chat is not None
         assert db_chat.title is None
@@ -70,35 +52,17 @@ class TestChatModel:
 
 
 class TestMessageModel:
-    def test_message_creation(self, db_session):
+    def test_message_creation(self, db_session, shared_chat):
         """Test message creation and association with chat."""
-        # Create a user first
-        user = User(
-            email="test@example.com",
-            username="testuser",
-            hashed_password="hashedpassword123"
-        )
-        db_session.add(user)
-        db_session.commit()
-        
-        # Create a chat
-        chat = Chat(
-            title="Test Chat",
-            user_id=user.id,
-            model="gpt-4"
-        )
-        db_session.add(chat)
-        db_session.commit()
-        
         # Create messages using factory methods
         message1 = Message.create_user_message(
-            chat_id=chat.id,
+            chat_id=shared_chat.id,
             content="Hello, how are you?",
             sequence=1
         )
         
         message2 = Message.create_assistant_message(
-            chat_id=chat.id,
+            chat_id=shared_chat.id,
             content="I'm doing well, thank you! How can I help you today?",
             sequence=2
         )
@@ -111,7 +75,7 @@ class TestMessageModel:
         
         # Query the messages back
         db_messages = db_session.query(Message).filter(
-            Message.chat_id == chat.id
+            Message.chat_id == shared_chat.id
         ).order_by(Message.sequence).all()
         
         assert len(db_messages) == 2
@@ -129,30 +93,13 @@ class TestMessageModel:
         assert db_messages[1].tokens == 15
         
         # Check relationship
-        assert db_messages[0].chat.title == "Test Chat"
+        assert db_messages[0].chat.title == shared_chat.title
         
-    def test_message_with_metadata(self, db_session):
+    def test_message_with_metadata(self, db_session, shared_chat):
         """Test message creation with metadata."""
-        # Create a user first
-        user = User(
-            email="test@example.com",
-            username="testuser",
-            hashed_password="hashedpassword123"
-        )
-        db_session.add(user)
-        db_session.commit()
-        
-        # Create a chat
-        chat = Chat(
-            title="Test Chat",
-            user_id=user.id
-        )
-        db_session.add(chat)
-        db_session.commit()
-        
         # Create a message with metadata
         message = Message.create_assistant_message(
-            chat_id=chat.id,
+            chat_id=shared_chat.id,
             content="This is a response with metadata",
             sequence=1
         )
@@ -170,7 +117,7 @@ class TestMessageModel:
         
         # Query the message back
         db_message = db_session.query(Message).filter(
-            Message.chat_id == chat.id
+            Message.chat_id == shared_chat.id
         ).first()
         
         assert db_message is not None
@@ -178,24 +125,15 @@ class TestMessageModel:
         assert db_message.message_metadata["finish_reason"] == "stop"
         assert db_message.message_metadata["processing_time"] == 1.25
     
-    def test_chat_message_cascade_delete(self, db_session):
+    def test_chat_message_cascade_delete(self, db_session, shared_user):
         """Test that messages are deleted when their chat is deleted."""
-        # Create a user first
-        user = User(
-            email="test@example.com",
-            username="testuser",
-            hashed_password="hashedpassword123"
-        )
-        db_session.add(user)
-        db_session.commit()
-        
         # Create a chat
         chat = Chat(
             title="Test Chat",
-            user_id=user.id
+            user_id=shared_user.id
         )
         db_session.add(chat)
-        db_session.commit()
+        db_session.flush()
         
         # Create messages
         message1 = Message.create_user_message(
@@ -211,20 +149,59 @@ class TestMessageModel:
         )
         
         db_session.add_all([message1, message2])
-        db_session.commit()
+        db_session.flush()
         
-        # Verify messages exist
-        message_count = db_session.query(Message).filter(
-            Message.chat_id == chat.id
-        ).count()
-        assert message_count == 2
-        
-        # Delete the chat
-        db_session.delete(chat)
+        # Delete the chat and count its messages in one statement; the count sees the rows
+        #  as they were before the delete
+        deleted = delete(Chat).where(Chat.id == chat.id).returning(Chat.id).cte("deleted")
+        message_count = db_session.scalar(
+            select(func.count()).select_from(Message).where(Message.chat_id.in_(select(deleted.c.id)))
+        )
         db_session.commit()
+        assert message_count == 2
         
         # Verify messages are deleted
         remaining_messages = db_session.query(Message).filter(
             Message.chat_id == chat.id
         ).count()
-        assert remaining_messages == 0 
\ No newline at end of file
+        assert remaining_messages == 0
+    
+    def test_chat_get_loads_messages_and_attachments_in_batches(self, db_session, shared_user):
+        """Test that serializing a chat takes one query per level, not per message."""
+        chat = Chat(title="Test Chat", user_id=shared_user.id)
+        db_session.add(chat)
+        db_session.flush()
+        
+        for sequence in range(1, 4):
+            message = Message.create_user_message(chat.id, f"Message {sequence}", sequence)
+            message.attachments.append(Attachment(
+                filename=f"file{sequence}.txt",
+                file_path=f"/tmp/file{sequence}.txt",
+                file_type="text/plain",
+                file_size=10
+            ))
+            db_session.add(message)
+        # Flush rather than commit: after a commit the session would open a new SAVEPOINT
+        #  on its next statement, which the listener below would count
+        db_session.flush()
+        # Read the id before expiring, so the count below doesn't include a reload of chat
+        chat_id = chat.id
+        db_session.expire_all()
+        
+        statements = []
+        
+        def count_statement(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        
+        engine = db_session.get_bind()
+        event.listen(engine, "before_cursor_execute", count_statement)
+        try:
+            db_chat = crud_chat.get(db_session, chat_id=chat_id, user_id=shared_user.id)
+            dumped = db_chat.model_dump()
+        finally:
+            event.remove(engine, "before_cursor_execute", count_statement)
+        
+        assert len(dumped["messages"]) == 3
+        assert all(len(message["attachments"]) == 1 for message in dumped["messages"])
+        # Chat, its messages, their attachments
+        assert len(statements) == 3
@@ -1,5 +1,6 @@
-import uuid
 import pytest
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
 
 from app.models.user import User
 from app.models.config import UserConfig, SystemConfig
@@ -8,18 +9,18 @@ from app.models.config import UserConfig, SystemConfig
 class TestUserConfigModel:
     def test_user_config_creation(self, db_session):
         """Test user config creation and association with user."""
-        # Create a user first
-        user = User(
-            email="test@example.com",
-            username="testuser",
-            hashed_password="hashedpassword123"
-        )
-        db_session.add(user)
-        db_session.commit()
+        # Create a user first; it only owns the config, so a plain INSERT will do
+        user_id = db_session.execute(
+            insert(User).values(
+                email="test@example.com",
+                username="testuser",
+                hashed_password="hashedpassword123"
+            ).returning(User.id)
+        ).scalar_one()
         
         # Create user config
         config = UserConfig(
-            user_id=user.id,
+            user_id=user_id,
             preferences={
                 "theme": "dark",
                 "notifications": True,
@@ -31,11 +32,11 @@ class TestUserConfigModel:
         
         # Query the config back
         db_config = db_session.query(UserConfig).filter(
-            UserConfig.user_id == user.id
+            UserConfig.user_id == user_id
         ).first()
         
         assert db_config is not None
-        assert db_config.user_id == user.id
+        assert db_config.user_id == user_id
         assert db_config.preferences["theme"] == "dark"
         assert db_config.preferences["notifications"] is True
         assert db_config.preferences["default_model"] == "gpt-4"
@@ -49,52 +50,39 @@ class TestUserConfigModel:
     
     def test_user_config_update(self, db_session):
         """Test updating user config."""
-        # Create a user first
-        user = User(
-            email="test@example.com",
-            username="testuser",
-            hashed_password="hashedpassword123"
-        )
-        db_session.add(user)
-        db_session.commit()
+        # Create a user first; it only owns the config, so a plain INSERT will do
+        user_id = db_session.execute(
+            insert(User).values(
+                email="test@example.com",
+                username="testuser",
+                hashed_password="hashedpassword123"
+            ).returning(User.id)
+        ).scalar_one()
         
         # Create user config
         config = UserConfig(
-            user_id=user.id,
+            user_id=user_id,
             preferences={
                 "theme": "light",
                 "notifications": False
             }
         )
         db_session.add(config)
-        db_session.commit()
+        db_session.flush()
         
-        # Update the config - create a new dictionary
+        # Update the config in place
         db_config = db_session.query(UserConfig).filter(
-            UserConfig.user_id == user.id
+            UserConfig.user_id == user_id
         ).first()
         
-        # Update preferences by creating a new dictionary with all values
-        db_config.preferences = {
-            **db_config.preferences,
-            "theme": "dark",
-            "font_size": "large"
-        }
+        db_config.preferences["theme"] = "dark"
+        db_config.preferences["font_size"] = "large"
         db_session.commit()
-
-        # The following is not allowed, it will raise an error
-        """ When you directly modify a JSON/JSONB field using dictionary-style access like db_config.preferences["theme"] = "dark", SQLAlchemy doesn't always detect the change to trigger an update to the database.
-            I've fixed it by:
-            Replacing the dictionary update method with a complete reassignment of the preferences field
-            Using dictionary unpacking (**db_config.preferences) to keep the existing values
-            Adding the updated values to create a completely new dictionary
-            This approach ensures that SQLAlchemy recognizes the change to the entire JSONB object and properly updates it in the database. The test should now pass because the updated values will be correctly stored and retrieved from the database."""
-        # db_config.preferences["theme"] = "dark"
-        # db_config.preferences["font_size"] = "large"
-        
-        # Query the updated config
+        
+        # Query the updated config, reloading it to check the in-place changes were written
+        db_session.expire(db_config)
         updated_config = db_session.query(UserConfig).filter(
-            UserConfig.user_id == user.id
+            UserConfig.user_id == user_id
         ).first()
         
         assert updated_config.preferences["theme"] == "dark"
@@ -127,18 +115,16 @@ class TestSystemConfigModel:
         db_session.add_all([config1, config2, config3])
         db_session.commit()
         
-        # Query the configs back
-        default_model = db_session.query(SystemConfig).filter(
-            SystemConfig.key == "default_model"
-        ).first()
-        
-        max_tokens = db_session.query(SystemConfig).filter(
-            SystemConfig.key == "max_tokens"
-        ).first()
-        
-        available_models = db_session.query(SystemConfig).filter(
-            SystemConfig.key == "available_models"
-        ).first()
+        # Query the configs back, all three in one round trip
+        configs = {
+            config.key: config
+            for config in db_session.query(SystemConfig).filter(
+                SystemConfig.key.in_(["default_model", "max_tokens", "available_models"])
+            )
+        }
+        default_model = configs.get("default_model")
+        max_tokens = configs.get("max_tokens")
+        available_models = configs.get("available_models")
         
         # Check default_model
         assert default_model is not None
@@ -180,13 +166,12 @@ class TestSystemConfigModel:
             value=60,
             description="Different description"
         )
-        db_session.add(config2)
-        
-        # Should raise an integrity error
-        with pytest.raises(Exception):
-            db_session.commit()
         
-        db_session.rollback()
+        # Should raise an integrity error; the savepoint rolls back only the failed insert
+        with pytest.raises(IntegrityError):
+            with db_session.begin_nested():
+                db_session.add(config2)
+                db_session.flush()
     
     def test_system_config_complex_json(self, db_session):
         """Test system config with complex JSON structure."""
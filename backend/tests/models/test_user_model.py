@@ -1,9 +1,15 @@
-import uuid
 import pytest
 from datetime import datetime, timedelta
 
+from sqlalchemy import func, insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload, raiseload
+
 from app.models.user import User, VerificationToken, PasswordResetToken, LoginAudit
 
+# Reference time for the token expiry cases, both for building and for checking them
+_NOW = datetime.utcnow()
+
 
 class TestUserModel:
     def test_user_creation(self, db_session):
@@ -15,25 +21,28 @@ class TestUserModel:
             full_name="Test User"
         )
         db_session.add(user)
-        db_session.commit()
+        db_session.flush()
         
-        # Query the user back from DB
-        db_user = db_session.query(User).filter(User.email == "test@example.com").first()
+        # Reload the stored columns by primary key
+        db_session.refresh(user)
         
-        assert db_user is not None
-        assert db_user.email == "test@example.com"
-        assert db_user.username == "testuser"
-        assert db_user.hashed_password == "hashedpassword123"
-        assert db_user.full_name == "Test User"
-        assert db_user.is_active is True
-        assert db_user.is_superuser is False
-        assert db_user.is_verified is False
+        assert user.email == "test@example.com"
+        assert user.username == "testuser"
+        assert user.hashed_password == "hashedpassword123"
+        assert user.full_name == "Test User"
+        assert user.is_active is True
+        assert user.is_superuser is False
+        assert user.is_verified is False
         
         # Ensure timestamps are created
-        assert db_user.created_at is not None
-        assert db_user.updated_at is not None
+        assert user.created_at is not None
+        assert user.updated_at is not None
     
-    def test_user_unique_constraints(self, db_session):
+    @pytest.mark.parametrize("duplicate", [
+        pytest.param({"email": "test@example.com", "username": "differentuser"}, id="email"),
+        pytest.param({"email": "different@example.com", "username": "testuser"}, id="username"),
+    ])
+    def test_user_unique_constraints(self, db_session, duplicate):
         """Test that email and username must be unique."""
         # Create first user
         user1 = User(
@@ -42,166 +51,78 @@ class TestUserModel:
             hashed_password="hashedpassword123"
         )
         db_session.add(user1)
-        db_session.commit()
-        
-        # Create second user with same email
-        user2 = User(
-            email="test@example.com",
-            username="differentuser",
-            hashed_password="hashedpassword123"
-        )
-        db_session.add(user2)
-        
-        # Should raise an integrity error
-        with pytest.raises(Exception):
-            db_session.commit()
-        
-        db_session.rollback()
-        
-        # Create third user with same username
-        user3 = User(
-            email="different@example.com",
-            username="testuser",
-            hashed_password="hashedpassword123"
-        )
-        db_session.add(user3)
-        
-        # Should raise an integrity error
-        with pytest.raises(Exception):
-            db_session.commit()
-            
-        db_session.rollback()
-
-
-class TestVerificationTokenModel:
-    def test_verification_token_creation(self, db_session):
-        """Test verification token creation and association with user."""
-        # Create a user first
-        user = User(
-            email="test@example.com",
-            username="testuser",
-            hashed_password="hashedpassword123"
-        )
-        db_session.add(user)
-        db_session.commit()
-        
-        # Create a verification token
-        token = VerificationToken(
-            token="abc123",
-            user_id=user.id,
-            expires_at=datetime.utcnow() + timedelta(hours=24)
-        )
-        db_session.add(token)
-        db_session.commit()
-        
-        # Query the token back
-        db_token = db_session.query(VerificationToken).filter(VerificationToken.token == "abc123").first()
-        
-        assert db_token is not None
-        assert db_token.token == "abc123"
-        assert db_token.user_id == user.id
-        assert db_token.expires_at > datetime.utcnow()
-        
-        # Check relationship
-        assert db_token.user.email == "test@example.com"
-
-
-class TestPasswordResetTokenModel:
-    def test_password_reset_token_creation(self, db_session):
-        """Test password reset token creation and association with user."""
-        # Create a user first
-        user = User(
-            email="test@example.com",
-            username="testuser",
-            hashed_password="hashedpassword123"
-        )
-        db_session.add(user)
-        db_session.commit()
-        
-        # Create a password reset token
-        token = PasswordResetToken(
-            token="reset123",
-            user_id=user.id,
-            expires_at=datetime.utcnow() + timedelta(hours=1)
-        )
-        db_session.add(token)
-        db_session.commit()
-        
-        # Query the token back
-        db_token = db_session.query(PasswordResetToken).filter(
-            PasswordResetToken.token == "reset123"
-        ).first()
-        
-        assert db_token is not None
-        assert db_token.token == "reset123"
-        assert db_token.user_id == user.id
-        assert db_token.expires_at > datetime.utcnow()
-        
-        # Check relationship
-        assert db_token.user.email == "test@example.com"
+        db_session.flush()
+        
+        # A second user sharing the email or the username should raise an integrity error;
+        #  the savepoint rolls back only the failed insert
+        with pytest.raises(IntegrityError):
+            with db_session.begin_nested():
+                db_session.add(User(hashed_password="hashedpassword123", **duplicate))
+                db_session.flush()
 
 
-class TestLoginAuditModel:
-    def test_login_audit_creation(self, db_session):
-        """Test login audit creation and association with user."""
-        # Create a user first
-        user = User(
-            email="test@example.com",
-            username="testuser",
-            hashed_password="hashedpassword123"
-        )
-        db_session.add(user)
-        db_session.commit()
-        
-        # Create a login audit
-        audit = LoginAudit(
-            user_id=user.id,
-            ip_address="192.168.1.1",
-            user_agent="Mozilla/5.0",
-            success=True
-        )
-        db_session.add(audit)
-        db_session.commit()
-        
-        # Query the audit back
-        db_audit = db_session.query(LoginAudit).filter(
-            LoginAudit.user_id == user.id
-        ).first()
-        
-        assert db_audit is not None
-        assert db_audit.user_id == user.id
-        assert db_audit.ip_address == "192.168.1.1"
-        assert db_audit.user_agent == "Mozilla/5.0"
-        assert db_audit.success is True
+class TestUserOwnedModels:
+    @pytest.mark.parametrize("model_cls, kwargs, check_attrs", [
+        pytest.param(
+            VerificationToken,
+            {"token": "abc123", "expires_at": _NOW + timedelta(hours=24)},
+            {"token": "abc123"},
+            id="verification-token"
+        ),
+        pytest.param(
+            PasswordResetToken,
+            {"token": "reset123", "expires_at": _NOW + timedelta(hours=1)},
+            {"token": "reset123"},
+            id="password-reset-token"
+        ),
+        pytest.param(
+            LoginAudit,
+            {"ip_address": "192.168.1.1", "user_agent": "Mozilla/5.0", "success": True},
+            {"ip_address": "192.168.1.1", "user_agent": "Mozilla/5.0", "success": True},
+            id="login-audit"
+        ),
+        pytest.param(
+            LoginAudit,
+            {"ip_address": "192.168.1.1", "user_agent": "Mozilla/5.0", "success": False},
+            {"success": False},
+            id="login-audit-failed-login"
+        ),
+    ])
+    def test_creation(self, db_session, shared_user, model_cls, kwargs, check_attrs):
+        """Test creating a token or login audit row and its association with the user."""
+        row = model_cls(user_id=shared_user.id, **kwargs)
+        db_session.add(row)
+        db_session.flush()
+        
+        # Reload the stored row together with its user in one joined SELECT; any other
+        #  relationship access would raise instead of lazy loading
+        row = db_session.scalars(
+            select(model_cls)
+            .where(model_cls.id == row.id)
+            .options(joinedload(model_cls.user), raiseload("*"))
+            .execution_options(populate_existing=True)
+        ).one()
+        
+        assert row.user_id == shared_user.id
+        for attribute, value in check_attrs.items():
+            assert getattr(row, attribute) == value
+        if "expires_at" in kwargs:
+            assert row.expires_at > _NOW
         
         # Check relationship
-        assert db_audit.user.email == "test@example.com"
-        
-    def test_login_audit_with_failed_login(self, db_session):
-        """Test login audit with failed login attempt."""
-        # Create a user first
-        user = User(
-            email="test@example.com",
-            username="testuser",
-            hashed_password="hashedpassword123"
-        )
-        db_session.add(user)
-        db_session.commit()
-        
-        # Create a failed login audit
-        audit = LoginAudit(
-            user_id=user.id,
-            ip_address="192.168.1.1",
-            user_agent="Mozilla/5.0",
-            success=False
+        assert row.user.email == shared_user.email
+    
+    def test_bulk_login_audits(self, db_session, shared_user):
+        """Test inserting many login audits in one executemany INSERT."""
+        attempts = [("192.168.1.%d" % i, i % 3 != 0) for i in range(1, 31)]
+        db_session.execute(insert(LoginAudit), [
+            {"user_id": shared_user.id, "ip_address": ip, "user_agent": "Mozilla/5.0", "success": success}
+            for ip, success in attempts
+        ])
+        
+        failed = db_session.scalar(
+            select(func.count()).select_from(LoginAudit).where(
+                LoginAudit.user_id == shared_user.id, LoginAudit.success.is_(False)
+            )
         )
-        db_session.add(audit)
-        db_session.commit()
-        
-        # Query the audit back
-        db_audit = db_session.query(LoginAudit).filter(
-            LoginAudit.user_id == user.id
-        ).first()
-        
-        assert db_audit is not None
-        assert db_audit.success is False 
\ No newline at end of file
+        assert failed == sum(1 for _, success in attempts if not success)